@@ -14,11 +14,16 @@ class Context(object):
             ``chainer.Variable`` or ``chainer.Parameter``, instance ID of
             ``ndarray`` held by the variable is also put as key, because some
             functions like ``F.where`` internally unwrap variable.
+        constant_names (dict): names of constant parameters added during
+            conversion, keyed by dtype, shape and bytes of the array. Used
+            to share one initializer among converters adding the same
+            constant.
 
     """
 
     def __init__(self, model):
         self.name_list = dict()
+        self.constant_names = dict()
         for name, param in model.namedparams():
             onnx_name = onnx_helper.cleanse_param_name(name)
             self.set_name(param, onnx_name)
@@ -1,74 +1,73 @@
+import functools
 import warnings
 
 import chainer
 import numpy as np
+from onnx import TensorProto
 from onnx.mapping import NP_TYPE_TO_TENSOR_TYPE
 
 from onnx_chainer.functions.opset_version import support
 from onnx_chainer import onnx_helper
 
 
-TENSOR_TYPE_TO_NAME = {
-    0: 'UNDEFINED',
-    1: 'FLOAT',
-    2: 'UINT8',
-    3: 'INT8',
-    4: 'UINT16',
-    5: 'INT16',
-    6: 'INT32',
-    7: 'INT64',
-    8: 'STRING',
-    9: 'BOOL',
-    10: 'FLOAT16',
-    11: 'DOUBLE',
-    12: 'UINT32',
-    13: 'UINT64',
-    14: 'COMPLEX64',
-    15: 'COMPLEX128',
-}
+_make_node = onnx_helper.make_node
+_GraphBuilder = onnx_helper.GraphBuilder
+
+
+# indexed by the value of ``onnx.TensorProto.DataType``
+TENSOR_TYPE_NAMES = tuple(
+    name for name, _ in sorted(
+        TensorProto.DataType.items(), key=lambda kv: kv[1]))
+
+
+@functools.lru_cache(maxsize=32)
+def _to_tensor_type(typ):
+    if not isinstance(typ, np.dtype):
+        typ = np.dtype(typ)
+    return NP_TYPE_TO_TENSOR_TYPE[typ]
+
+
+def _get_const_name(context, parameters, array):
+    # share the parameter when the same constant has already been added
+    key = (array.dtype.str, array.shape, array.tobytes())
+    name = context.constant_names.get(key)
+    if name is None:
+        param = chainer.Parameter(array)
+        parameters.append(param)
+        name = context.get_name(param)
+        context.constant_names[key] = name
+    return name
 
 
 @support((1, 6))
 def convert_Cast(func, opset_version, input_names, output_names,
                  context, parameters):
-    typ = func.type if isinstance(func.type, np.dtype) else np.dtype(func.type)
+    tensor_type = _to_tensor_type(func.type)
     if opset_version == 1:
-        return onnx_helper.make_node(
-            'Cast', input_names, output_names,
-            to=TENSOR_TYPE_TO_NAME[NP_TYPE_TO_TENSOR_TYPE[typ]]
-        ),
-    elif opset_version == 6:
-        return onnx_helper.make_node(
-            'Cast', input_names, output_names,
-            to=NP_TYPE_TO_TENSOR_TYPE[typ]
-        ),
+        tensor_type = TENSOR_TYPE_NAMES[tensor_type]
+    return _make_node(
+        'Cast', input_names, output_names, to=tensor_type),
 
 
 @support((1, 4))
 def convert_Concat(func, opset_version, input_names,
                    output_names, context, parameters):
-    if opset_version == 1:
-        return onnx_helper.make_node(
-            'Concat', input_names, output_names,
-            axis=func.axis
-        ),
-    elif opset_version == 4:
-        return onnx_helper.make_node(
-            'Concat', input_names, output_names,
-            axis=func.axis
-        ),
+    return _make_node(
+        'Concat', input_names, output_names,
+        axis=func.axis
+    ),
 
 
 def convert_Copy(func, opset_version, input_names, output_names,
                  context, parameters):
-    return onnx_helper.make_node(
+    return _make_node(
         'Identity', input_names, output_names
     ),
 
 
 def convert_Depth2Space(func, opset_version, input_names,
                         output_names, context, parameters):
-    return onnx_helper.make_node(
+    return _make_node(
         'DepthToSpace', input_names, output_names,
         blocksize=func.r
     ),
@@ -77,9 +76,26 @@ def convert_Depth2Space(func, opset_version, input_names,
 def convert_GetItem(func, opset_version, input_names,
                     output_names, context, parameters):
     x = func.inputs[0]
+
+    # fast path: only basic slices with unit step, neither squeeze nor
+    # unsqueeze is needed and each index maps directly to the same axis of x
+    if all(type(idx) is slice and (idx.step is None or idx.step == 1)
+           for idx in func.slices):
+        shape = x.shape
+        axes = list(range(len(func.slices)))
+        starts = [0 if idx.start is None else idx.start
+                  for idx in func.slices]
+        ends = [shape[i] if idx.stop is None else idx.stop
+                for i, idx in enumerate(func.slices)]
+        gb = _GraphBuilder()
+        gb.op('Slice', input_names, axes=axes, starts=starts, ends=ends)
+        return gb.nodes(output_names=output_names)
+
     axes, starts, ends = [], [], []
     squeeze_idxs, unsqueeze_idxs = [], []
     skipped = 0  # when set ellipsis, need to skip index rolling
+    none_count_total = sum(1 for idx in func.slices if idx is None)
+    none_count_before = 0
 
     for i, idx in enumerate(func.slices):
         # axis means the index of input x, adjust None and Ellipsis counts
@@ -105,11 +121,12 @@ def convert_GetItem(func, opset_version, input_names,
             squeeze_idxs.append(axis)
         elif idx is None:
             unsqueeze_idxs.append(i - len(squeeze_idxs) + skipped)
+            none_count_before += 1
         elif idx is Ellipsis:
             # calculate rest slice number except None, GetItem does not allow
             # multiple Ellipsis, so ignore latter Ellipsis count
-            rest_slice_len = len(
-                [idx_ for idx_ in func.slices[i+1:] if idx_ is not None])
+            rest_none = none_count_total - none_count_before
+            rest_slice_len = len(func.slices) - i - 1 - rest_none
             assert skipped == 0
             skipped = len(x.shape) - axis - rest_slice_len - 1
         else:
@@ -118,7 +135,7 @@ def convert_GetItem(func, opset_version, input_names,
                 'GetItem with type {} cannot handle in ONNX Slice, so that '
                 'ONNX-Chainer does not accept the type'.format(type(idx)))
 
-    gb = onnx_helper.GraphBuilder()
+    gb = _GraphBuilder()
     output = gb.op('Slice', input_names,
                    axes=axes, starts=starts, ends=ends)
 
@@ -141,15 +158,9 @@ def convert_Pad(func, opset_version, input_names, output_names,
             '{} mode is not supported in ONNX\'s Pad operation'.format(
                 func.mode))
 
-    pad_begin = []
-    pad_end = []
-    pad_bw = func.pad_bw
-    if pad_bw.ndim == 1:
-        pad_bw = np.tile(pad_bw, (len(func.inputs[0].shape), 1))
-    for pp in pad_bw.tolist():
-        pad_begin.append(pp[0])
-        pad_end.append(pp[1])
-    pad = pad_begin + pad_end
+    pad_bw = np.broadcast_to(func.pad_bw, (len(func.inputs[0].shape), 2))
+    # ONNX expects [x1_begin, x2_begin, ..., x1_end, x2_end, ...]
+    pad = pad_bw.T.reshape(-1).tolist()
 
     if 'constant_values' in func.keywords:
         values = func.keywords['constant_values']
@@ -161,36 +172,23 @@ def convert_Pad(func, opset_version, input_names, output_names,
             values = float(values[0])
         else:
             values = float(values)
-
-        if opset_version == 1:
-            node = onnx_helper.make_node(
-                'Pad', input_names, output_names,
-                mode=func.mode,
-                paddings=pad,
-                value=values
-            )
-        elif opset_version == 2:
-            node = onnx_helper.make_node(
-                'Pad', input_names, output_names,
-                mode=func.mode,
-                pads=pad,
-                value=values
-            )
     else:
-        if opset_version == 1:
-            node = onnx_helper.make_node(
-                'Pad', input_names, output_names,
-                mode=func.mode,
-                paddings=pad,
-                value=0.,
-            )
-        elif opset_version == 2:
-            node = onnx_helper.make_node(
-                'Pad', input_names, output_names,
-                mode=func.mode,
-                pads=pad,
-                value=0.,
-            )
+        values = 0.
+
+    if opset_version == 1:
+        node = _make_node(
+            'Pad', input_names, output_names,
+            mode=func.mode,
+            paddings=pad,
+            value=values
+        )
+    elif opset_version == 2:
+        node = _make_node(
+            'Pad', input_names, output_names,
+            mode=func.mode,
+            pads=pad,
+            value=values
+        )
 
     return node,
 
@@ -199,24 +197,22 @@ def convert_Pad(func, opset_version, input_names, output_names,
 def convert_Reshape(func, opset_version, input_names,
                     output_names, context, parameters):
     if opset_version == 1:
-        return onnx_helper.make_node(
+        return _make_node(
             'Reshape', input_names, output_names,
             shape=func.shape
         ),
     elif opset_version == 5:
         shape = np.asarray(list(func.shape), dtype=np.int64)
-        shape_param = chainer.Parameter(shape)
-        parameters.append(shape_param)
-        input_names.append(context.get_name(shape_param))
+        input_names.append(_get_const_name(context, parameters, shape))
 
-        return onnx_helper.make_node(
+        return _make_node(
             'Reshape', input_names, output_names,
         ),
 
 
 def convert_Space2Depth(func, opset_version, input_names,
                         output_names, context, parameters):
-    return onnx_helper.make_node(
+    return _make_node(
         'SpaceToDepth', input_names, output_names,
         blocksize=func.r
     ),
@@ -231,40 +227,27 @@ def convert_SplitAxis(func, opset_version, input_names,
         indices_or_sections = func.sections
 
     if hasattr(indices_or_sections, '__iter__'):
-        split = []
-        prev_i = 0
-        for i in indices_or_sections:
-            split.append(i - prev_i)
-            prev_i = i
+        indices = np.asarray(indices_or_sections, dtype=np.int64)
+        split = np.diff(np.concatenate(([0], indices))).tolist()
     else:
         length = func.inputs[0].shape[func.axis] // indices_or_sections
-        split = [length for _ in range(indices_or_sections)]
+        split = [length] * indices_or_sections
 
-    if opset_version == 1:
-        return onnx_helper.make_node(
-            'Split', input_names, output_names,
-            axis=func.axis,
-            split=split
-        ),
-    elif opset_version == 2:
-        return onnx_helper.make_node(
-            'Split', input_names, output_names,
-            axis=func.axis,
-            split=split
-        ),
+    return _make_node(
+        'Split', input_names, output_names,
+        axis=func.axis,
+        split=split
+    ),
 
 
 def convert_Squeeze(func, opset_version, input_names,
                     output_names, context, parameters):
     if func.axis is None:
-        axis = []
-        for i, s in enumerate(func.inputs[0].shape):
-            if s == 1:
-                axis.append(i)
+        axis = np.flatnonzero(np.equal(func.inputs[0].shape, 1)).tolist()
     else:
         axis = func.axis
 
-    return onnx_helper.make_node(
+    return _make_node(
         'Squeeze', input_names, output_names,
         axes=axis
     ),
@@ -272,10 +255,12 @@ def convert_Squeeze(func, opset_version, input_names,
 
 def convert_Swapaxes(func, opset_version, input_names,
                      output_names, context, parameters):
-    perm = list(range(len(func.inputs[0].shape)))
-    perm[func.axis1], perm[func.axis2] = perm[func.axis2], perm[func.axis1]
+    ndim = len(func.inputs[0].shape)
+    axis1, axis2 = func.axis1, func.axis2
+    perm = [*range(ndim)]
+    perm[axis1], perm[axis2] = perm[axis2], perm[axis1]
 
-    return onnx_helper.make_node(
+    return _make_node(
         'Transpose', input_names, output_names, perm=perm
     ),
 
@@ -287,28 +272,23 @@ def convert_Tile(func, opset_version, input_names, output_names,
     if isinstance(func.reps, int):
         func.reps = [func.reps]
     tiles = np.asarray(func.reps, dtype=np.int64)
-
-    tiles_param = chainer.Parameter(tiles)
-    parameters.append(tiles_param)
-    input_names.append(context.get_name(tiles_param))
+    input_names.append(_get_const_name(context, parameters, tiles))
 
     # In operater version = 1, axis also should be given
     if opset_version == 1:
-        axis = np.array([i for i, _ in enumerate(func.reps)], dtype=np.float32)
-        axis_param = chainer.Parameter(axis)
-        parameters.append(axis_param)
-        input_names.append(context.get_name(axis_param))
+        axis = np.arange(len(func.reps), dtype=np.float32)
+        input_names.append(_get_const_name(context, parameters, axis))
 
-    return onnx_helper.make_node('Tile', input_names, output_names),
+    return _make_node('Tile', input_names, output_names),
 
 
 def convert_Transpose(func, opset_version, input_names,
                       output_names, context, parameters):
 
     if func.axes is None:
-        node = onnx_helper.make_node('Transpose', input_names, output_names)
+        node = _make_node('Transpose', input_names, output_names)
     else:
-        node = onnx_helper.make_node(
+        node = _make_node(
             'Transpose', input_names, output_names,
             perm=func.axes
         )
@@ -322,7 +302,7 @@ def convert_ExpandDims(func, opset_version, input_names,
     if axis < 0:
         axis = len(func.inputs[0].shape) + 1 + axis
 
-    return onnx_helper.make_node(
+    return _make_node(
         'Unsqueeze', input_names, output_names, axes=[axis]),
 
 
@@ -330,7 +310,7 @@ def convert_ExpandDims(func, opset_version, input_names,
 def convert_Where(func, opset_version, input_names, output_names, context,
                   parameters):
     input_names.insert(0, context.get_name(func.condition))
-    return onnx_helper.make_node('Where', input_names, output_names),
+    return _make_node('Where', input_names, output_names),
 
 
 @support((7, 9))
@@ -341,28 +321,27 @@ def convert_Repeat(func, opset_version, input_names, output_names, context,
         raise NotImplementedError(
             'ONNX-Chainer currently does not support elementwise repeat')
 
-    gb = onnx_helper.GraphBuilder()
+    gb = _GraphBuilder()
     inputs = list(input_names)
     axis = func.axis
     if axis is None:
-        shape_param = chainer.Parameter(np.array([-1]))
-        parameters.append(shape_param)
-        input_names.append(context.get_name(shape_param))
+        shape = np.array([-1], dtype=np.int64)
+        input_names.append(_get_const_name(context, parameters, shape))
         inputs = [gb.op('Reshape', input_names)]
-        scales = [float(repeats[0])]
+        ndim, axis = 1, 0
     else:
-        scales = [1.0] * func.inputs[0].data.ndim
-        scales[axis] = float(repeats[0])
+        ndim = func.inputs[0].data.ndim
 
     if opset_version == 7:
+        scales = [1.0] * ndim
+        scales[axis] = float(repeats[0])
         gb.op_output_named('Upsample', inputs, output_names, scales=scales)
         return gb.nodes()
 
     if opset_version == 9:
-        scales = np.array(scales, dtype=np.float32)
-        scales_param = chainer.Parameter(scales)
-        parameters.append(scales_param)
-        inputs.append(context.get_name(scales_param))
+        scales = np.ones(ndim, dtype=np.float32)
+        scales[axis] = repeats[0]
+        inputs.append(_get_const_name(context, parameters, scales))
         gb.op_output_named('Upsample', inputs, output_names)
         return gb.nodes()
 
@@ -400,21 +379,19 @@ def convert_ResizeImages(func, opset_version, input_names, output_names,
     # Actually this will be mapped to 'bilinear' in onnxruntime
     mode = 'linear'
     if opset_version == 7:
-        return onnx_helper.make_node('Upsample', input_names, output_names,
-                                     scales=scales, mode=mode),
+        return _make_node('Upsample', input_names, output_names,
+                          scales=scales, mode=mode),
 
     if opset_version == 9:
         scales = np.array(scales, dtype=np.float32)
-        scales_param = chainer.Parameter(scales)
-        parameters.append(scales_param)
-        input_names.append(context.get_name(scales_param))
-        return onnx_helper.make_node('Upsample', input_names, output_names,
-                                     mode=mode),
+        input_names.append(_get_const_name(context, parameters, scales))
+        return _make_node('Upsample', input_names, output_names,
+                          mode=mode),
 
 
 def convert_Stack(func, opset_version, input_names, output_names, context,
                   parameters):
-    gb = onnx_helper.GraphBuilder()
+    gb = _GraphBuilder()
     axis = func.axis
     if axis < 0:
         axis = len(func.inputs[0].shape) + 1 + axis
@@ -425,55 +402,55 @@ def convert_Stack(func, opset_version, input_names, output_names, context,
     return gb.nodes()
 
 
-def convert_Hstack(func, opset_version, input_names, output_names, context,
-                   parameters):
-    gb = onnx_helper.GraphBuilder()
+# (kind, ndim of the first input) -> (axes to unsqueeze, axis to concat),
+# ndim larger than listed falls on the largest entry of the kind
+_STACK_TABLE = {
+    ('h', 0): ([0], 0),
+    ('h', 1): (None, 0),
+    ('h', 2): (None, 1),
+    ('v', 0): ([0, 1], 0),
+    ('v', 1): ([0], 0),
+    ('v', 2): (None, 0),
+    ('d', 0): ([0, 1, 2], 2),
+    ('d', 1): ([0, 2], 2),
+    ('d', 2): ([2], 2),
+    ('d', 3): (None, 2),
+}
+_STACK_MAX_NDIM = {'h': 2, 'v': 2, 'd': 3}
+
+
+def _emit_stack(kind, func, input_names, output_names):
     input0_ndim = len(func.inputs[0].shape)
+    axes, axis = _STACK_TABLE[
+        kind, min(input0_ndim, _STACK_MAX_NDIM[kind])]
+
+    gb = _GraphBuilder()
     inputs = input_names
-    axis = 1
-    if input0_ndim == 0:
-        inputs = [gb.op('Unsqueeze', [name], axes=[0]) for name in input_names]
-        axis = 0
-    elif input0_ndim == 1:
-        axis = 0
+    if axes is not None:
+        inputs = [gb.op('Unsqueeze', [name], axes=axes) for
+                  name in input_names]
     gb.op_output_named('Concat', inputs, output_names, axis=axis)
     return gb.nodes()
 
 
+def convert_Hstack(func, opset_version, input_names, output_names, context,
+                   parameters):
+    return _emit_stack('h', func, input_names, output_names)
+
+
 def convert_Vstack(func, opset_version, input_names, output_names, context,
                    parameters):
-    gb = onnx_helper.GraphBuilder()
-    input0_ndim = len(func.inputs[0].shape)
-    inputs = input_names
-    if input0_ndim == 0:
-        inputs = [gb.op('Unsqueeze', [name], axes=[0, 1]) for
-                  name in input_names]
-    elif input0_ndim == 1:
-        inputs = [gb.op('Unsqueeze', [name], axes=[0]) for name in input_names]
-    gb.op_output_named('Concat', inputs, output_names, axis=0)
-    return gb.nodes()
+    return _emit_stack('v', func, input_names, output_names)
 
 
 def convert_Dstack(func, opset_version, input_names, output_names, context,
                    parameters):
-    gb = onnx_helper.GraphBuilder()
-    input0_ndim = len(func.inputs[0].shape)
-    inputs = input_names
-    if input0_ndim == 0:
-        inputs = [gb.op('Unsqueeze', [name], axes=[0, 1, 2]) for
-                  name in input_names]
-    elif input0_ndim == 1:
-        inputs = [gb.op('Unsqueeze', [name], axes=[0, 2]) for
-                  name in input_names]
-    elif input0_ndim == 2:
-        inputs = [gb.op('Unsqueeze', [name], axes=[2]) for name in input_names]
-    gb.op_output_named('Concat', inputs, output_names, axis=2)
-    return gb.nodes()
+    return _emit_stack('d', func, input_names, output_names)
 
 
 def convert_Separate(func, opset_version, input_names, output_names, context,
                      parameters):
-    gb = onnx_helper.GraphBuilder()
+    gb = _GraphBuilder()
     split_outs = gb.op(
         'Split', input_names, num_outputs=len(output_names), axis=func.axis)
     for i, node_name in enumerate(split_outs):
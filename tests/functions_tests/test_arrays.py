@@ -5,6 +5,7 @@ import chainer.functions as F
 from chainer import testing
 import numpy as np
 
+from onnx_chainer import export
 from onnx_chainer.testing import input_generator
 from tests.helper import ONNXModelTest
 
@@ -55,6 +56,11 @@ from tests.helper import ONNXModelTest
      'args': {'pad_width': 2,
               'mode': 'constant'},
      'name': 'pad_scalar_pad_width'},
+    {'ops': 'pad', 'input_shape': (1, 2, 3, 4),
+     'input_argname': 'x',
+     'args': {'pad_width': ((1, 2),),
+              'mode': 'constant'},
+     'name': 'pad_single_pair_pad_width'},
 
     # reshape
     {'ops': 'reshape', 'input_shape': (1, 6),
@@ -123,6 +129,10 @@ from tests.helper import ONNXModelTest
      'input_argname': 'x',
      'args': {'slices': (slice(1, None))},
      'name': 'get_item_1tonone'},
+    {'ops': 'get_item', 'input_shape': (2, 2, 3),
+     'input_argname': 'x',
+     'args': {'slices': (slice(0, 2, 1), slice(None), slice(1, None, 1))},
+     'name': 'get_item_step1'},
     {'ops': 'get_item', 'input_shape': (2, 2, 3),
      'input_argname': 'x',
      'args': {'slices': 0},
@@ -281,6 +291,48 @@ class TestResizeImages(ONNXModelTest):
         assert len(w) == 1
 
 
+@testing.parameterize(
+    {'shapes': [(2, 3), (2, 3)], 'n_initializers': 1,
+     'name': 'reshape_same_shape'},
+    {'shapes': [(2, 3), (3, 2)], 'n_initializers': 2,
+     'name': 'reshape_different_shape'},
+)
+class TestSharedConstant(ONNXModelTest):
+
+    def setUp(self):
+
+        class Model(chainer.Chain):
+
+            def __init__(self, shapes):
+                super(Model, self).__init__()
+                self.shapes = shapes
+
+            def __call__(self, x1, x2):
+                return tuple(F.reshape(x, shape) for x, shape in
+                             zip((x1, x2), self.shapes))
+
+        self.model = Model(self.shapes)
+        self.x1 = input_generator.increasing(1, 6)
+        self.x2 = input_generator.increasing(1, 6)
+
+    def test_output(self):
+        self.expect(self.model, (self.x1, self.x2), name=self.name)
+
+    def test_initializers(self):
+        onnx_model = export(self.model, (self.x1, self.x2))
+
+        reshape_nodes = [node for node in onnx_model.graph.node if
+                         node.op_type == 'Reshape']
+        assert len(reshape_nodes) == 2
+        shape_names = {node.input[1] for node in reshape_nodes}
+        assert len(shape_names) == self.n_initializers
+
+        initializer_names = [initializer.name for initializer in
+                             onnx_model.graph.initializer if
+                             initializer.name in shape_names]
+        assert sorted(initializer_names) == sorted(shape_names)
+
+
 @testing.parameterize(
     {'ops': 'stack', 'in_shapes': [(3, 4), (3, 4)], 'kwargs': {},
      'name': 'stack_default'},